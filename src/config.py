@@ -4,80 +4,16 @@ ScriptWeaverの全体設定を集約管理
 """
 
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Optional
 from pathlib import Path
 
 
-@dataclass
-class ScriptWeaverConfig:
-    """ScriptWeaver全体設定"""
-    
-    # ファイル処理設定
-    default_encoding: str = 'utf-8'
-    supported_encodings: List[str] = field(default_factory=lambda: [
-        'utf-8', 'shift_jis', 'cp932', 'euc-jp', 'iso-2022-jp'
-    ])
-    max_file_size: int = 50 * 1024 * 1024  # 50MB
-    encoding_detection_sample_size: int = 100000  # 100KB
-    encoding_confidence_threshold: float = 0.7
-    
-    # HTML生成設定
-    html_title: str = 'TRPGシナリオ'
-    css_template_path: Optional[Path] = None
-    include_toc: bool = True
-    toc_title: str = '目次'
-    
-    # バリデーション設定
-    enable_validation: bool = False
-    strict_mode: bool = False
-    trpg_system: str = "CoC6"
-    custom_skills: List[str] = field(default_factory=list)
-    warning_threshold: int = 10
-    auto_fix: bool = True
-    beginner_mode: bool = False
-    
-    # パフォーマンス設定
-    regex_cache_size: int = 256
-    heading_id_cache_size: int = 256
-    enable_chardet: bool = True
-    
-    # 出力設定
-    output_suffix: str = '.html'
-    preserve_original: bool = True
-    
-    def __post_init__(self):
-        """初期化後の処理"""
-        # CSSテンプレートパスのデフォルト設定
-        if self.css_template_path is None:
-            self.css_template_path = Path(__file__).parent.parent / 'templates' / 'style.css'
-    
-    def get_validation_config(self):
-        """バリデーション用設定を取得"""
-        from .validation import ValidationConfig
-        return ValidationConfig(
-            strict_mode=self.strict_mode,
-            trpg_system=self.trpg_system,
-            custom_skills=self.custom_skills,
-            warning_threshold=self.warning_threshold,
-            auto_fix=self.auto_fix,
-            beginner_mode=self.beginner_mode
-        )
-    
-    def load_css_template(self) -> str:
-        """CSSテンプレートを読み込み"""
-        if self.css_template_path and self.css_template_path.exists():
-            try:
-                with open(self.css_template_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except Exception:
-                pass
-        
-        # フォールバック用の基本CSS
-        return self._get_fallback_css()
-    
-    def _get_fallback_css(self) -> str:
-        """フォールバック用の基本CSS"""
-        return """
+# デフォルトのCSSテンプレートパス
+_DEFAULT_CSS_PATH = Path(__file__).parent.parent / 'templates' / 'style.css'
+
+# フォールバック用の基本CSS
+_FALLBACK_CSS = """
         body {
             font-family: "Noto Sans JP", "Hiragino Kaku Gothic ProN", "Meiryo", sans-serif;
             line-height: 1.6;
@@ -159,6 +95,101 @@ class ScriptWeaverConfig:
             border-radius: 4px;
         }
         """
+
+
+@lru_cache(maxsize=4)
+def _read_css(path: Path) -> str:
+    """CSSファイルを読み込み（成功した読み込みのみパスごとにキャッシュ）"""
+    if not path.exists():
+        raise FileNotFoundError(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _load_css(path: Path) -> Optional[str]:
+    """CSSファイルを読み込み（読み込めない場合はNone、失敗はキャッシュしない）"""
+    try:
+        return _read_css(path)
+    except Exception:
+        return None
+
+
+def load_default_css() -> str:
+    """デフォルトCSSテンプレートを読み込み（読み込めない場合はフォールバック用の基本CSS）"""
+    css = _load_css(_DEFAULT_CSS_PATH)
+    if css is not None:
+        return css
+    return _FALLBACK_CSS
+
+
+@dataclass
+class ScriptWeaverConfig:
+    """ScriptWeaver全体設定"""
+    
+    # ファイル処理設定
+    default_encoding: str = 'utf-8'
+    supported_encodings: List[str] = field(default_factory=lambda: [
+        'utf-8', 'shift_jis', 'cp932', 'euc-jp', 'iso-2022-jp'
+    ])
+    max_file_size: int = 50 * 1024 * 1024  # 50MB
+    encoding_detection_sample_size: int = 100000  # 100KB
+    encoding_confidence_threshold: float = 0.7
+    
+    # HTML生成設定
+    html_title: str = 'TRPGシナリオ'
+    css_template_path: Optional[Path] = None
+    include_toc: bool = True
+    toc_title: str = '目次'
+    
+    # バリデーション設定
+    enable_validation: bool = False
+    strict_mode: bool = False
+    trpg_system: str = "CoC6"
+    custom_skills: List[str] = field(default_factory=list)
+    warning_threshold: int = 10
+    auto_fix: bool = True
+    beginner_mode: bool = False
+    
+    # パフォーマンス設定
+    regex_cache_size: int = 256
+    heading_id_cache_size: int = 256
+    enable_chardet: bool = True
+    
+    # 出力設定
+    output_suffix: str = '.html'
+    preserve_original: bool = True
+    
+    def __post_init__(self):
+        """初期化後の処理"""
+        # CSSテンプレートパスのデフォルト設定
+        if self.css_template_path is None:
+            self.css_template_path = _DEFAULT_CSS_PATH
+    
+    def get_validation_config(self):
+        """バリデーション用設定を取得"""
+        from .validation import ValidationConfig
+        return ValidationConfig(
+            strict_mode=self.strict_mode,
+            trpg_system=self.trpg_system,
+            custom_skills=self.custom_skills,
+            warning_threshold=self.warning_threshold,
+            auto_fix=self.auto_fix,
+            beginner_mode=self.beginner_mode
+        )
+    
+    def load_css_template(self) -> str:
+        """CSSテンプレートを読み込み（読み込み結果はパスごとにキャッシュ）"""
+        if self.css_template_path:
+            css = _load_css(self.css_template_path)
+            if css is not None:
+                return css
+        
+        # フォールバック用の基本CSS
+        return self._get_fallback_css()
+    
+    def _get_fallback_css(self) -> str:
+        """フォールバック用の基本CSS"""
+        return _FALLBACK_CSS
     
     @classmethod
     def create_default(cls) -> 'ScriptWeaverConfig':
@@ -3,63 +3,173 @@
 TRPGシナリオテキストの解析・構造化・TRPG記法処理を担当
 """
 
+import hashlib
+import html
 import re
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional
 from functools import lru_cache
 
+_html_escape = html.escape
+
+# 段落（空行で区切られた非空行の連なり）
+_PARA_RE = re.compile(r'[^\n]+(?:\n[^\n]+)*')
+
+# 見出しID生成用パターン
+_ID_STRIP_RE = re.compile(r'[^\w\s-]')
+_ID_DASH_RE = re.compile(r'[-\s]+')
+_ID_LEAD_DIGIT_RE = re.compile(r'^\d+')
+_ID_NUM_SEQ_RE = re.compile(r'^(\d+(?:-\d+)*)')
+_ID_ALNUM_RE = re.compile(r'[a-zA-Z0-9]')
+
+# CoC6版記法パターン
+_SKILL_RE = re.compile(r'【([^】]+)】')
+_ITEM_RE = re.compile(r'『([^』]+)』')
+_DICE_RE = re.compile(r'(\d+[dD]\d+(?:[+\-]\d+)?)', re.IGNORECASE)
+_SAN_RE = re.compile(r'(SANc?\d+/\d+(?:d\d+)?(?:[+\-]\d+)?)')
+# 上記4記法を1回の走査で処理する統合パターン（優先順位：SAN > ダイス > 技能 > アイテム）
+_COC_RE = re.compile(
+    r'(?P<san>SANc?\d+/\d+(?:d\d+)?(?:[+\-]\d+)?)'
+    r'|(?P<dice>\d+[dD]\d+(?:[+\-]\d+)?)'
+    r'|【(?P<skill>[^】]+)】'
+    r'|『(?P<item>[^』]+)』'
+)
+
+# 見出しパターン（1. / 1-1. / 1-1-1. 形式、ピリオド後の空白は任意）
+_NUMBERED_HEADING_RE = re.compile(r'^(\d+(?:-\d+){0,2})\.(\s+)?(.+)')
+
+# 構造要素パターン
+_SECTION_DIVIDER_RE = re.compile(r'^(===+|---+)')
+# 括弧内に能力値キーワードを含む行（[^)]で括弧内に限定し、.*の後戻りを避ける）
+_NPC_STATUS_RE = re.compile(r'\([^)]*(?:STR|CON|SIZ|INT|POW|DEX|HP)[^)]*\)')
+
+# CoC記法の名前付きグループ → 付与するspanの開きタグ
+_COC_SPAN_OPEN = {
+    'san': '<span class="coc-san">',
+    'dice': '<span class="coc-dice">',
+    'skill': '<span class="coc-skill">',
+    'item': '<span class="coc-item">',
+}
+
+
+def _coc_span(match: re.Match) -> str:
+    """統合パターンのマッチ種別に応じたspanを返す"""
+    return f'{_COC_SPAN_OPEN[match.lastgroup]}{match.group(0)}</span>'
+
+
+class _BlockScan(NamedTuple):
+    """段落を1回走査して得た行単位の特徴（区切り線・表・リスト・NPCの判定基準を一元化）"""
+    has_divider: bool
+    pipe_lines: int
+    definition_lines: int
+    bullet_lines: int
+    has_npc_status: bool
+    
+    @property
+    def is_table(self) -> bool:
+        # パイプ文字を含む行が2行以上
+        return self.pipe_lines >= 2
+    
+    @property
+    def is_definition_list(self) -> bool:
+        # ◆で始まる行が2行以上
+        return self.definition_lines >= 2
+    
+    @property
+    def is_bullet_list(self) -> bool:
+        # ・で始まる行が2行以上
+        return self.bullet_lines >= 2
+
+
+def _scan_block(paragraph: str) -> _BlockScan:
+    """段落の各行を1回だけ走査して構造要素の特徴を集計"""
+    has_divider = False
+    pipe_lines = 0
+    definition_lines = 0
+    bullet_lines = 0
+    has_npc_status = False
+    
+    for line in paragraph.strip().split('\n'):
+        stripped = line.strip()
+        if stripped.startswith(('===', '---')):
+            has_divider = True
+        if '|' in line:
+            pipe_lines += 1
+        if stripped.startswith('◆'):
+            definition_lines += 1
+        elif stripped.startswith('・'):
+            bullet_lines += 1
+        if not has_npc_status and '(' in line and _NPC_STATUS_RE.search(line):
+            has_npc_status = True
+    
+    return _BlockScan(has_divider, pipe_lines, definition_lines, bullet_lines, has_npc_status)
+
+
+@lru_cache(maxsize=256)
+def _numbered_heading_level(text: str) -> Optional[int]:
+    """番号付き見出しならレベル（1. → 1, 1-1. → 2, 1-1-1. → 3）、そうでなければNoneを返す（キャッシュ付き）"""
+    match = _NUMBERED_HEADING_RE.match(text)
+    if not match:
+        return None
+    # 番号部分のハイフン数からレベルを決定
+    return match.group(1).count('-') + 1
+
+
+def _process_coc_text(text: str) -> str:
+    """HTMLエスケープ後にCoC6版記法を1パスで変換"""
+    escaped_text = _html_escape(text, quote=True)
+    
+    # 記法の目印（【 『 d D SAN）がなければ正規表現を走らせない
+    if not ('【' in text or '『' in text or 'd' in text or 'D' in text or 'SAN' in text):
+        return escaped_text
+    
+    # 優先順位：SAN記法 > ダイス表記 > 技能 > アイテム
+    return _COC_RE.sub(_coc_span, escaped_text)
+
 
 class ContentProcessor:
     """コンテンツ処理専用クラス"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 256):
         # 正規表現パターンを事前コンパイル（パフォーマンス改善）
         self._compile_patterns()
+        
+        # CoC記法変換結果のキャッシュ（インスタンスごとに持ち、不要になれば一緒に解放される）
+        self._process_coc_cached = lru_cache(maxsize=cache_size)(_process_coc_text)
     
     def _compile_patterns(self):
-        """正規表現パターンを事前コンパイル"""
+        """事前コンパイル済みの正規表現パターンを割り当て"""
         # CoC6版記法パターン
-        self.skill_pattern = re.compile(r'【([^】]+)】')
-        self.item_pattern = re.compile(r'『([^』]+)』')
-        self.dice_pattern = re.compile(r'(\d+[dD]\d+(?:[+\-]\d+)?)', re.IGNORECASE)
-        self.san_pattern = re.compile(r'(SANc?\d+/\d+(?:d\d+)?(?:[+\-]\d+)?)')
-        self.dialogue_pattern = re.compile(r'「([^」]+)」')
+        self.skill_pattern = _SKILL_RE
+        self.item_pattern = _ITEM_RE
+        self.dice_pattern = _DICE_RE
+        self.san_pattern = _SAN_RE
+        self.coc_combined = _COC_RE
         
         # 見出しパターン
-        self.numbered_heading_patterns = [
-            re.compile(r'^(\d+)\.\s+(.+)'),           # 1. タイトル
-            re.compile(r'^(\d+)\.(.+)'),              # 1.タイトル
-            re.compile(r'^(\d+-\d+)\.\s+(.+)'),       # 1-1. サブタイトル
-            re.compile(r'^(\d+-\d+)\.(.+)'),          # 1-1.サブタイトル
-            re.compile(r'^(\d+-\d+-\d+)\.\s+(.+)'),   # 1-1-1. 詳細タイトル
-            re.compile(r'^(\d+-\d+-\d+)\.(.+)'),      # 1-1-1.詳細タイトル
-        ]
+        self.numbered_heading_pattern = _NUMBERED_HEADING_RE
         
         # 構造要素パターン
-        self.section_divider_pattern = re.compile(r'^(===+|---+)')
-        self.definition_marker_pattern = re.compile(r'^◆\s*(.+)')
-        self.bullet_marker_pattern = re.compile(r'^・\s*(.+)')
-        self.npc_status_pattern = re.compile(r'\(.*(?:STR|CON|SIZ|INT|POW|DEX|HP).*\)')
+        self.section_divider_pattern = _SECTION_DIVIDER_RE
+        self.npc_status_pattern = _NPC_STATUS_RE
     
     def split_paragraphs(self, content: str) -> List[str]:
         """テキストを段落に分割（構造を考慮した分割）"""
         paragraphs = []
         
-        # 一旦通常の段落分割
-        raw_paragraphs = content.split('\n\n')
-        
-        for paragraph in raw_paragraphs:
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
-                
+        # 空行区切りの段落を順に取り出す（分割リストの中間生成を避ける）
+        for match in _PARA_RE.finditer(content):
             # セクション区切りと見出し、内容が混在している場合は分離
-            separated = self._separate_structural_elements(paragraph)
-            paragraphs.extend(separated)
+            paragraphs.extend(self._separate_structural_elements(match.group()))
         
-        return [p for p in paragraphs if p.strip()]
+        return paragraphs
     
     def _separate_structural_elements(self, paragraph: str) -> List[str]:
         """構造要素（見出し、区切り線等）を分離"""
+        # 1行だけの段落は種別に関わらずその行自体が結果になる
+        if '\n' not in paragraph:
+            line = paragraph.strip()
+            return [line] if line else []
+        
         lines = paragraph.split('\n')
         result = []
         current_group = []
@@ -79,7 +189,7 @@ class ContentProcessor:
                 result.append(line)
                 
             # 番号付き見出しの場合
-            elif self._is_numbered_heading(line):
+            elif line[:1].isdigit() and self._is_numbered_heading(line):
                 # 現在のグループを保存
                 if current_group:
                     result.append('\n'.join(current_group))
@@ -112,69 +222,53 @@ class ContentProcessor:
                     'type': 'hash'
                 })
             
-            # 番号付き見出し
-            elif self._is_numbered_heading(paragraph):
-                level = self._determine_heading_level(paragraph)
-                headings.append({
-                    'text': paragraph.strip(),
-                    'level': level,
-                    'id': self._generate_heading_id(paragraph),
-                    'type': 'numbered'
-                })
+            # 番号付き見出し（先頭が数字の段落のみ正規表現で判定）
+            elif paragraph[:1].isdigit():
+                level = _numbered_heading_level(paragraph)
+                if level is not None:
+                    headings.append({
+                        'text': paragraph.strip(),
+                        'level': level,
+                        'id': self._generate_heading_id(paragraph),
+                        'type': 'numbered'
+                    })
         
         return headings
     
     def _is_numbered_heading(self, text: str) -> bool:
         """番号付き見出しかどうかを判定"""
-        return any(pattern.match(text) for pattern in self.numbered_heading_patterns)
+        return _numbered_heading_level(text) is not None
     
     def _determine_heading_level(self, text: str) -> int:
         """番号付き見出しのレベルを判定"""
-        for i, pattern in enumerate(self.numbered_heading_patterns, 1):
-            if pattern.match(text):
-                # パターンのインデックスに基づいてレベルを決定
-                if i <= 2:  # 1. or 1.xxx
-                    return 1
-                elif i <= 4:  # 1-1. or 1-1.xxx
-                    return 2
-                else:  # 1-1-1. or 1-1-1.xxx
-                    return 3
+        level = _numbered_heading_level(text)
+        if level is not None:
+            return level
         return 2  # デフォルト
     
     @lru_cache(maxsize=256)
     def _generate_heading_id(self, text: str) -> str:
         """見出しテキストからIDを生成（キャッシュ付き）"""
         # 特殊文字を除去し、英数字とハイフンのみに
-        text = re.sub(r'[^\w\s-]', '', text)
-        text = re.sub(r'[-\s]+', '-', text)
+        text = _ID_STRIP_RE.sub('', text)
+        text = _ID_DASH_RE.sub('-', text)
         text = text.strip('-').lower()
         
         # 日本語の場合は数字部分のみ使用
-        if re.match(r'^\d+', text):
-            number_match = re.match(r'^(\d+(?:-\d+)*)', text)
+        if _ID_LEAD_DIGIT_RE.match(text):
+            number_match = _ID_NUM_SEQ_RE.match(text)
             if number_match:
                 return f"heading-{number_match.group(1)}"
         
         # 英数字がない場合はハッシュ値を使用
-        if not text or not re.search(r'[a-zA-Z0-9]', text):
-            import hashlib
+        if not text or not _ID_ALNUM_RE.search(text):
             return f"heading-{hashlib.md5(text.encode()).hexdigest()[:8]}"
         
         return f"heading-{text}"
     
     def process_coc_elements(self, text: str) -> str:
-        """CoC6版特有要素を処理"""
-        # まずHTMLエスケープを実行
-        escaped_text = self._escape_html(text)
-        
-        # エスケープ後のテキストに対してCoC6版変換を適用
-        # 優先順位：SAN記法 > ダイス表記 > 技能 > アイテム
-        escaped_text = self._convert_san_notation(escaped_text)
-        escaped_text = self._convert_dice_notation(escaped_text)
-        escaped_text = self._convert_skill_notation(escaped_text)
-        escaped_text = self._convert_item_notation(escaped_text)
-        
-        return escaped_text
+        """CoC6版特有要素を処理（同一テキストの再処理はキャッシュから返す）"""
+        return self._process_coc_cached(text)
     
     def _convert_skill_notation(self, text: str) -> str:
         """【技能名】記法をHTMLに変換"""
@@ -194,46 +288,59 @@ class ContentProcessor:
     
     def _escape_html(self, text: str) -> str:
         """HTMLエスケープ処理（標準ライブラリを使用）"""
-        import html
-        return html.escape(text, quote=True)
+        return _html_escape(text, quote=True)
     
-    def is_table(self, paragraph: str) -> bool:
-        """段落が表形式かどうかを判定"""
-        lines = paragraph.strip().split('\n')
-        if len(lines) < 2:
-            return False
-        
-        # パイプ文字を含む行が2行以上あるかチェック
-        pipe_lines = [line for line in lines if '|' in line]
-        if len(pipe_lines) < 2:
-            return False
+    def classify(self, paragraph: str) -> str:
+        """
+        段落の種別を判定（優先順位の高いものから確定した時点で返す）
         
-        # セパレータ行（---）があるかチェック
-        has_separator = any('-' * 3 in line for line in lines)
+        Returns:
+            'heading', 'numbered_heading', 'section_divider', 'table',
+            'definition_list', 'bullet_list', 'npc_status', 'dialogue', 'paragraph'
+            のいずれか
+        """
+        if paragraph.startswith('#'):
+            return 'heading'
+        # 先頭が数字でなければ正規表現（とキャッシュ）を通さない
+        if paragraph[:1].isdigit() and self._is_numbered_heading(paragraph):
+            return 'numbered_heading'
         
-        return has_separator or len(pipe_lines) >= 2
+        # 残りの種別は行単位の1回の走査でまとめて判定（is_*と同じ基準を使用）
+        scan = _scan_block(paragraph)
+        if scan.has_divider:
+            return 'section_divider'
+        if scan.is_table:
+            return 'table'
+        if scan.is_definition_list:
+            return 'definition_list'
+        if scan.is_bullet_list:
+            return 'bullet_list'
+        if scan.has_npc_status:
+            return 'npc_status'
+        if self.has_dialogue(paragraph):
+            return 'dialogue'
+        return 'paragraph'
+    
+    def is_table(self, paragraph: str) -> bool:
+        """段落が表形式かどうかを判定"""
+        # パイプ文字がなければ走査せずに判定終了
+        return '|' in paragraph and _scan_block(paragraph).is_table
     
     def is_section_divider(self, paragraph: str) -> bool:
         """セクション区切りかどうかを判定"""
-        lines = paragraph.strip().split('\n')
-        return any(self.section_divider_pattern.match(line.strip()) for line in lines)
+        return ('===' in paragraph or '---' in paragraph) and _scan_block(paragraph).has_divider
     
     def is_definition_list(self, paragraph: str) -> bool:
         """定義リスト（◆項目）かどうかを判定"""
-        lines = paragraph.strip().split('\n')
-        definition_lines = [line for line in lines if line.strip().startswith('◆')]
-        return len(definition_lines) >= 2
+        return '◆' in paragraph and _scan_block(paragraph).is_definition_list
     
     def is_bullet_list(self, paragraph: str) -> bool:
         """箇条書き（・項目）かどうかを判定"""
-        lines = paragraph.strip().split('\n')
-        bullet_lines = [line for line in lines if line.strip().startswith('・')]
-        return len(bullet_lines) >= 2
+        return '・' in paragraph and _scan_block(paragraph).is_bullet_list
     
     def is_npc_status(self, paragraph: str) -> bool:
         """NPCステータスかどうかを判定"""
-        lines = paragraph.strip().split('\n')
-        return any(self.npc_status_pattern.search(line) for line in lines)
+        return '(' in paragraph and _scan_block(paragraph).has_npc_status
     
     def has_dialogue(self, text: str) -> bool:
         """会話文（「」）が含まれているかチェック"""
@@ -5,6 +5,8 @@ ScriptWeaver変換処理モジュール
 リファクタリング版: 内部的に新しい設計を使用しつつ、既存APIとの互換性を保持
 """
 
+import re
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
@@ -12,6 +14,9 @@ from typing import Optional
 from .config import ScriptWeaverConfig
 from .converter_refactored import ScriptConverter as RefactoredScriptConverter
 
+# 見出しテキスト抽出用パターン
+_HEADING_TEXT_RE = re.compile(r'^[\d\-]+\.\s*(.+)')
+
 
 class ScriptConverter:
     """
@@ -32,13 +37,23 @@ class ScriptConverter:
         self.config = ScriptWeaverConfig.create_default()
         self.config.enable_validation = enable_validation
         
-        # リファクタリングされたコンバータを内部で使用
-        self._converter = RefactoredScriptConverter(self.config)
-        
         # 互換性のためのプロパティ
-        self.css_template = self.config.load_css_template()
         self.enable_validation = enable_validation
-        self.validation_engine = self._converter.validation_engine
+    
+    @cached_property
+    def _converter(self) -> RefactoredScriptConverter:
+        """リファクタリングされたコンバータ（初回アクセス時に生成）"""
+        return RefactoredScriptConverter(self.config)
+    
+    @cached_property
+    def css_template(self) -> str:
+        """CSSテンプレート（互換性維持、初回アクセス時に読み込み）"""
+        return self.config.load_css_template()
+    
+    @property
+    def validation_engine(self):
+        """バリデーションエンジン（互換性維持）"""
+        return self._converter.validation_engine
     
     def convert(self, input_file: Path, include_validation_report: bool = False) -> Path:
         """
@@ -161,8 +176,7 @@ class ScriptConverter:
     def _extract_heading_text(self, paragraph: str) -> str:
         """見出しテキスト抽出（互換性維持）"""
         # 簡略実装
-        import re
-        match = re.match(r'^[\d\-]+\.\s*(.+)', paragraph)
+        match = _HEADING_TEXT_RE.match(paragraph)
         if match:
             return match.group(1)
         return paragraph
@@ -239,7 +253,6 @@ class ScriptConverter:
         
         # プロパティも更新
         self.enable_validation = self.config.enable_validation
-        self.validation_engine = self._converter.validation_engine
     
     def get_supported_formats(self) -> list[str]:
         """サポート形式の取得"""
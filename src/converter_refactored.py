@@ -3,8 +3,10 @@
 責任分離とパフォーマンス改善を実装
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional
 
 from .config import ScriptWeaverConfig
 from .file_reader import FileReader
@@ -17,6 +19,9 @@ try:
 except ImportError:
     VALIDATION_AVAILABLE = False
 
+# 出力ファイルの書き込みバッファサイズ（小さな断片ごとのwrite呼び出しを抑える）
+_OUTPUT_BUFFER_SIZE = 1 << 20
+
 
 class ScriptConverter:
     """
@@ -35,7 +40,7 @@ class ScriptConverter:
         
         # 各専門クラスを初期化
         self.file_reader = FileReader()
-        self.content_processor = ContentProcessor()
+        self.content_processor = ContentProcessor(self.config.regex_cache_size)
         self.html_generator = HTMLGenerator(self.config.load_css_template())
         
         # バリデーションエンジンの初期化
@@ -68,7 +73,7 @@ class ScriptConverter:
             
         Raises:
             ValueError: 対応していないファイル形式の場合
-            IOError: ファイル読み込みに失敗した場合
+            IOError: ファイル読み込み・書き込みに失敗した場合
         """
         # ファイルサポート確認
         if not self.file_reader.is_supported_file(input_file):
@@ -93,25 +98,78 @@ class ScriptConverter:
         paragraphs = self.content_processor.split_paragraphs(content)
         headings = self.content_processor.collect_headings(paragraphs)
         
-        # HTML生成
-        html_content = self.html_generator.generate_html(
-            paragraphs, 
-            headings, 
-            self.content_processor,
-            validation_report if include_validation_report else None
-        )
-        
         # 出力ファイル作成
         output_file = input_file.with_suffix(self.config.output_suffix)
         
+        # HTML生成（文書全体を文字列として保持せず同じディレクトリの一時ファイルへ逐次書き込み、
+        # 成功した場合のみ出力ファイルと置き換える）
+        temp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-        except Exception as e:
-            raise IOError(f"HTMLファイルの書き込みに失敗しました: {output_file}\nエラー: {e}")
+            with open(temp_file, 'w', encoding='utf-8', buffering=_OUTPUT_BUFFER_SIZE) as f:
+                self.html_generator.write_html(
+                    paragraphs, 
+                    headings, 
+                    self.content_processor,
+                    f,
+                    validation_report if include_validation_report else None
+                )
+            os.replace(temp_file, output_file)
+        except BaseException as e:
+            # 失敗時は既存の出力ファイルを残し、書きかけの一時ファイルを削除
+            temp_file.unlink(missing_ok=True)
+            if isinstance(e, OSError):
+                raise IOError(f"HTMLファイルの書き込みに失敗しました: {output_file}\nエラー: {e}") from e
+            raise
         
         return output_file
     
+    def convert_many(
+        self,
+        input_files: Iterable[Path],
+        max_workers: Optional[int] = None,
+        include_validation_report: bool = False
+    ) -> List[Path]:
+        """
+        現在の設定で複数ファイルを並列に変換
+        
+        ワーカープロセスは self.config のみから ScriptConverter を作り直すため、
+        インスタンスに追加したバリデータなどの状態は引き継がれない。
+        
+        Args:
+            input_files: 変換対象ファイルのリスト
+            max_workers: ワーカープロセス数（Noneの場合はCPU数）
+            include_validation_report: バリデーションレポートをHTMLに含めるか
+            
+        Returns:
+            List[Path]: 生成されたHTMLファイルのパス（入力と同じ順序）
+            
+        Raises:
+            ValueError: 標準以外のバリデータが登録されている場合
+        """
+        if self._has_custom_validators():
+            raise ValueError(
+                "標準以外のバリデータが登録されているため並列変換できません"
+                "（ワーカーは設定のみから再構築されます）"
+            )
+        
+        input_files = list(input_files)
+        
+        # 1ファイル以下ならこのインスタンスで直接変換
+        if len(input_files) <= 1:
+            return [self.convert(input_file, include_validation_report) for input_file in input_files]
+        
+        return convert_many(input_files, self.config, max_workers, include_validation_report)
+    
+    def _has_custom_validators(self) -> bool:
+        """設定から再構築できないバリデータ構成かどうかを判定"""
+        if self.validation_engine is None:
+            return False
+        
+        from .validation import SkillValidator, HeadingValidator, DiceValidator
+        
+        registered = tuple(type(validator) for validator in self.validation_engine.validators)
+        return registered != (SkillValidator, HeadingValidator, DiceValidator)
+    
     def validate_only(self, input_file: Path):
         """
         バリデーションのみ実行（変換はしない）
@@ -186,4 +244,58 @@ def create_beginner_converter() -> ScriptConverter:
 def create_strict_converter() -> ScriptConverter:
     """厳密モードコンバータを作成"""
     config = ScriptWeaverConfig.create_strict_mode()
-    return ScriptConverter(config)
\ No newline at end of file
+    return ScriptConverter(config)
+
+
+# 複数ファイルの並列変換
+_worker_converter: Optional[ScriptConverter] = None
+_worker_include_report = False
+
+
+def _init_worker(config: Optional[ScriptWeaverConfig], include_validation_report: bool = False):
+    """ワーカープロセスごとにコンバータを1つだけ生成（CSS読み込みも1回）"""
+    global _worker_converter, _worker_include_report
+    _worker_converter = ScriptConverter(config)
+    _worker_include_report = include_validation_report
+
+
+def _convert_worker(input_file: Path) -> Path:
+    """ワーカープロセスで1ファイルを変換"""
+    return _worker_converter.convert(input_file, _worker_include_report)
+
+
+def convert_many(
+    input_files: Iterable[Path],
+    config: Optional[ScriptWeaverConfig] = None,
+    max_workers: Optional[int] = None,
+    include_validation_report: bool = False
+) -> List[Path]:
+    """
+    複数ファイルをプロセスプールで並列に変換
+    
+    Args:
+        input_files: 変換対象ファイルのリスト
+        config: ScriptWeaverの設定オブジェクト
+        max_workers: ワーカープロセス数（Noneの場合はCPU数）
+        include_validation_report: バリデーションレポートをHTMLに含めるか
+        
+    Returns:
+        List[Path]: 生成されたHTMLファイルのパス（入力と同じ順序）
+    """
+    input_files = list(input_files)
+    
+    # 1ファイル以下ならプロセス起動のコストを避けて直接変換
+    if len(input_files) <= 1:
+        converter = ScriptConverter(config)
+        return [converter.convert(input_file, include_validation_report) for input_file in input_files]
+    
+    # ファイル数が多い場合はワーカーあたり約4回に分けて受け渡し、IPCの往復を減らす
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(input_files) // (4 * workers))
+    
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(config, include_validation_report)
+    ) as executor:
+        return list(executor.map(_convert_worker, input_files, chunksize=chunksize))
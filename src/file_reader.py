@@ -3,8 +3,9 @@
 .txt/.docx ファイルの読み込みとエンコーディング検出を担当
 """
 
+import codecs
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 import chardet
 
 try:
@@ -13,6 +14,23 @@ try:
 except ImportError:
     DOCX_AVAILABLE = False
 
+# BOM（先頭バイト列）とエンコーディングの対応
+# UTF-32-LEのBOMはUTF-16-LEのBOMで始まるため、UTF-32を先に判定する
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# chardetに渡すサンプルサイズ（最大100KB）
+_DETECT_SAMPLE_SIZE = 100000
+
+# 対応拡張子（python-docxの有無はインポート時に確定する）
+_SUPPORTED_EXTENSIONS = ('.txt', '.docx') if DOCX_AVAILABLE else ('.txt',)
+_SUPPORTED_EXTENSION_SET = frozenset(_SUPPORTED_EXTENSIONS)
+
 
 class FileReader:
     """ファイル読み込み専用クラス"""
@@ -23,49 +41,65 @@ class FileReader:
     
     def read_file(self, file_path: Path) -> str:
         """ファイル形式に応じて適切な読み込み方法を選択"""
-        if file_path.suffix.lower() == '.txt':
+        suffix = file_path.suffix.lower()
+        if suffix == '.txt':
             return self._read_text_file(file_path)
-        elif file_path.suffix.lower() == '.docx':
+        elif suffix == '.docx':
             return self._read_docx_file(file_path)
         else:
             raise ValueError(f"対応していない形式: {file_path.suffix}")
     
     def _read_text_file(self, file_path: Path) -> str:
         """テキストファイルを読み込み（エンコーディング自動検出）"""
-        # まず chardet でエンコーディングを検出
-        detected_encoding = self._detect_encoding_with_chardet(file_path)
+        # ファイルは1回だけバイト列として読み込み、判定とデコードはメモリ上で行う
+        raw_data = file_path.read_bytes()
+        content = self._decode_bytes(raw_data, file_path)
+        
+        # テキストモードでの読み込みと同様に改行コードを\nに統一
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+    
+    def _decode_bytes(self, raw_data: bytes, file_path: Path) -> str:
+        """バイト列をBOM・chardet・フォールバックの順で判定してデコード"""
+        # BOM付きの場合は検出処理を行わない
+        for bom, encoding in _BOMS:
+            if raw_data.startswith(bom):
+                return raw_data.decode(encoding)
+        
+        # ASCIIのみのファイルは検出不要（C実装の1回の走査で判定）
+        # ISO-2022-JPも7bitのため、エスケープシーケンス（ESC）を含む場合は除外
+        # BOMなしUTF-16/32のASCII文字もNULを含む7bitデータになるため除外
+        if raw_data.isascii() and b'\x00' not in raw_data and b'\x1b' not in raw_data:
+            return raw_data.decode('ascii')
+        
+        # chardet でエンコーディングを検出
+        detected_encoding = self._detect_encoding_with_chardet(raw_data)
         if detected_encoding:
             try:
-                with open(file_path, 'r', encoding=detected_encoding) as f:
-                    return f.read()
-            except UnicodeDecodeError:
+                return raw_data.decode(detected_encoding)
+            except (UnicodeDecodeError, LookupError):
                 pass
         
         # chardet が失敗した場合は従来の方法でフォールバック
-        return self._read_with_fallback_encodings(file_path)
+        return self._decode_with_fallback_encodings(raw_data, file_path)
     
-    def _detect_encoding_with_chardet(self, file_path: Path) -> Optional[str]:
+    def _detect_encoding_with_chardet(self, raw_data: bytes) -> Optional[str]:
         """chardetライブラリを使用してエンコーディングを検出"""
+        if not raw_data:
+            return None
+        
         try:
-            with open(file_path, 'rb') as f:
-                # ファイルサイズに応じてサンプルサイズを調整
-                file_size = file_path.stat().st_size
-                sample_size = min(file_size, 100000)  # 最大100KB
-                raw_data = f.read(sample_size)
-                
-                if not raw_data:
-                    return None
-                
-                result = chardet.detect(raw_data)
+            result = chardet.detect(raw_data[:_DETECT_SAMPLE_SIZE])
+            
+            # 信頼度が70%以上の場合のみ採用
+            if result and result.get('confidence', 0) > 0.7:
+                encoding = result['encoding']
+                # chardetの結果をPythonのエンコーディング名に正規化
+                return self._normalize_encoding_name(encoding)
                 
-                # 信頼度が70%以上の場合のみ採用
-                if result and result.get('confidence', 0) > 0.7:
-                    encoding = result['encoding']
-                    # chardetの結果をPythonのエンコーディング名に正規化
-                    return self._normalize_encoding_name(encoding)
-                    
         except Exception:
-            # chardetライブラリがない場合やエラーの場合はNoneを返す
+            # chardetでエラーが発生した場合はNoneを返す
             pass
         
         return None
@@ -93,14 +127,13 @@ class FileReader:
         
         return mapping.get(encoding_lower, encoding)
     
-    def _read_with_fallback_encodings(self, file_path: Path) -> str:
-        """フォールバックエンコーディングリストで順次試行"""
+    def _decode_with_fallback_encodings(self, raw_data: bytes, file_path: Path) -> str:
+        """フォールバックエンコーディングリストで順次デコードを試行"""
         last_error = None
         
         for encoding in self.supported_encodings:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
+                return raw_data.decode(encoding)
             except UnicodeDecodeError as e:
                 last_error = e
                 continue
@@ -120,26 +153,23 @@ class FileReader:
             )
         
         try:
-            doc = Document(file_path)
-            paragraphs = []
-            
-            for paragraph in doc.paragraphs:
-                text = paragraph.text.strip()
-                if text:
-                    paragraphs.append(text)
-            
-            return '\n\n'.join(paragraphs)
+            return '\n\n'.join(self._iter_docx_paragraphs(file_path))
             
         except Exception as e:
             raise IOError(f"Word文書の読み込みに失敗しました: {file_path}\nエラー: {e}")
     
+    def _iter_docx_paragraphs(self, file_path: Path) -> Iterator[str]:
+        """Word文書の空でない段落テキストを順に生成"""
+        doc = Document(file_path)
+        for paragraph in doc.paragraphs:
+            text = paragraph.text.strip()
+            if text:
+                yield text
+    
     def get_supported_extensions(self) -> list[str]:
         """サポートしているファイル拡張子のリストを返す"""
-        extensions = ['.txt']
-        if DOCX_AVAILABLE:
-            extensions.append('.docx')
-        return extensions
+        return list(_SUPPORTED_EXTENSIONS)
     
     def is_supported_file(self, file_path: Path) -> bool:
         """ファイルがサポートされているかチェック"""
-        return file_path.suffix.lower() in self.get_supported_extensions()
\ No newline at end of file
+        return file_path.suffix.lower() in _SUPPORTED_EXTENSION_SET
\ No newline at end of file
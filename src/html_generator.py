@@ -4,8 +4,42 @@ HTML生成専用モジュール
 """
 
 import re
-from pathlib import Path
-from typing import List, Dict, Optional
+from html import escape as _html_escape
+from typing import List, Dict, Iterator, Optional, TextIO
+
+from .config import load_default_css
+
+# 変換処理で使用する正規表現（モジュール読み込み時に一度だけコンパイル）
+_NUMBERED_LEVEL_RE = re.compile(r'^\d+(?:-\d+){0,2}\.')
+# 括弧内に能力値キーワードを含む行（[^)]で括弧内に限定し、.*の後戻りを避ける）
+# NPC名・ステータス値の括弧・残りの情報を1回のmatchで分離する
+# （括弧内にステータスキーワードを含まない行はマッチしない）
+_NPC_LINE_RE = re.compile(r'^([^()]+?)\s*(\([^)]*(?:STR|CON|SIZ|INT|POW|DEX|HP)[^)]*\))(.*)$')
+_NPC_ATTACK_RE = re.compile(r'(噛みつき|爪|ダメージ|\d+d\d+)')
+_DIALOGUE_RE = re.compile(r'「([^」]+)」')
+
+# 目次の階層ごとのインデント（レベル1〜10）
+_TOC_INDENTS = tuple('    ' * i for i in range(10))
+
+# HTMLドキュメントの固定部分（CSSの前後と本文の後）
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>TRPGシナリオ</title>
+    <style>
+"""
+_HTML_MID = """
+    </style>
+</head>
+<body>
+    <div class="container">
+"""
+_HTML_TAIL = """
+    </div>
+</body>
+</html>"""
 
 
 class HTMLGenerator:
@@ -14,6 +48,16 @@ class HTMLGenerator:
     def __init__(self, css_template: str = None):
         self.css_template = css_template or self._load_default_css()
     
+    @property
+    def css_template(self) -> str:
+        return self._css_template
+    
+    @css_template.setter
+    def css_template(self, css: str) -> None:
+        # CSSを埋め込んだ文書の先頭部分は設定時に1度だけ組み立てる
+        self._css_template = css
+        self._doc_prefix = f"{_HTML_HEAD}{css}{_HTML_MID}"
+    
     def generate_html(
         self, 
         paragraphs: List[str], 
@@ -22,105 +66,116 @@ class HTMLGenerator:
         validation_report=None
     ) -> str:
         """処理されたコンテンツからHTMLを生成"""
+        return ''.join(self._iter_html(paragraphs, headings, processor, validation_report))
+    
+    def write_html(
+        self,
+        paragraphs: List[str],
+        headings: List[Dict],
+        processor,  # ContentProcessorインスタンス
+        stream: TextIO,
+        validation_report=None
+    ) -> None:
+        """HTMLを断片ごとにストリームへ書き込み（文書全体を文字列として保持しない）"""
+        stream.writelines(self._iter_html(paragraphs, headings, processor, validation_report))
+    
+    def _iter_html(
+        self,
+        paragraphs: List[str],
+        headings: List[Dict],
+        processor,
+        validation_report=None
+    ) -> Iterator[str]:
+        """HTMLドキュメントを先頭から順に断片として生成"""
+        yield self._doc_prefix
         
-        # 目次を生成
-        toc_html = self._generate_toc(headings)
-        
-        # 段落をHTMLに変換（見出しIDを付与）
-        html_body = self._process_paragraphs(paragraphs, headings, processor)
-        
-        # バリデーションレポートを挿入（オプション）
-        validation_html = ""
+        # バリデーションレポートを先頭に挿入（オプション）
         if validation_report:
             validation_html = self._generate_validation_html(validation_report)
+            if validation_html:
+                yield validation_html
+                yield '\n'
         
         # 目次を本文の前に挿入
+        toc_html = self._generate_toc(headings)
         if toc_html:
-            html_body = f"{toc_html}\n{html_body}"
+            yield toc_html
+            yield '\n'
         
-        # バリデーションレポートを先頭に挿入
-        if validation_html:
-            html_body = f"{validation_html}\n{html_body}"
-        
-        # 完全なHTMLドキュメントを生成
-        return self._create_html_document(html_body)
-    
-    def _create_html_document(self, body_content: str) -> str:
-        """完全なHTMLドキュメントを作成"""
-        return f"""<!DOCTYPE html>
-<html lang="ja">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>TRPGシナリオ</title>
-    <style>
-{self.css_template}
-    </style>
-</head>
-<body>
-    <div class="container">
-{body_content}
-    </div>
-</body>
-</html>"""
+        # 段落をHTMLに変換（見出しIDを付与）
+        first = True
+        for part in self._iter_paragraphs(paragraphs, headings, processor):
+            if not first:
+                yield '\n'
+            yield part
+            first = False
+        
+        yield _HTML_TAIL
     
     def _generate_toc(self, headings: List[Dict]) -> str:
         """目次HTMLを生成"""
         if not headings:
             return ""
         
-        html = '        <nav class="table-of-contents">\n'
-        html += '            <h2 class="toc-title">目次</h2>\n'
-        html += '            <ul class="toc-list">\n'
+        html_parts = [
+            '        <nav class="table-of-contents">',
+            '            <h2 class="toc-title">目次</h2>',
+            '            <ul class="toc-list">',
+        ]
         
         for heading in headings:
-            indent = '    ' * (heading['level'] - 1)
-            html += f'            {indent}<li class="toc-level-{heading["level"]}">\n'
-            html += f'            {indent}    <a href="#{heading["id"]}">{self._escape_html(heading["text"])}</a>\n'
-            html += f'            {indent}</li>\n'
-        
-        html += '            </ul>\n'
-        html += '        </nav>'
-        return html
+            level = heading['level']
+            indent = _TOC_INDENTS[level - 1] if level <= len(_TOC_INDENTS) else '    ' * (level - 1)
+            html_parts.append(f'            {indent}<li class="toc-level-{level}">')
+            html_parts.append(f'            {indent}    <a href="#{heading["id"]}">{_html_escape(heading["text"], True)}</a>')
+            html_parts.append(f'            {indent}</li>')
+        
+        html_parts.append('            </ul>')
+        html_parts.append('        </nav>')
+        return '\n'.join(html_parts)
     
     def _process_paragraphs(self, paragraphs: List[str], headings: List[Dict], processor) -> str:
         """段落をHTMLに変換"""
-        html_parts = []
-        
+        return '\n'.join(self._iter_paragraphs(paragraphs, headings, processor))
+    
+    def _iter_paragraphs(self, paragraphs: List[str], headings: List[Dict], processor) -> Iterator[str]:
+        """段落を1つずつHTMLに変換して生成"""
         # 見出しIDのマッピングを作成
         heading_ids = {heading['text']: heading['id'] for heading in headings}
         
+        # 処理系を引数に取る変換メソッドの種別ごとの対応表
+        converters = {
+            'section_divider': self._convert_section_divider,
+            'table': self._convert_table,
+            'definition_list': self._convert_definition_list,
+            'bullet_list': self._convert_bullet_list,
+            'npc_status': self._convert_npc_status,
+            'dialogue': self._convert_dialogue,
+        }
+        
+        # ループ内で使うメソッドをローカル変数に束縛（属性参照を1回に）
+        classify = processor.classify
+        process = processor.process_coc_elements
+        heading_level = processor._determine_heading_level
+        convert_heading = self._convert_heading
+        convert_numbered_heading = self._convert_numbered_heading
+        
         for paragraph in paragraphs:
+            kind = classify(paragraph)
+            
+            # 通常の段落
+            if kind == 'paragraph':
+                yield f'        <p>{process(paragraph)}</p>'
             # 見出しの処理（#記号形式）
-            if paragraph.startswith('#'):
-                html_parts.append(self._convert_heading(paragraph, heading_ids))
+            elif kind == 'heading':
+                yield convert_heading(paragraph, heading_ids)
             # 番号付き見出しの処理
-            elif processor._is_numbered_heading(paragraph):
-                html_parts.append(self._convert_numbered_heading(paragraph, heading_ids))
-            # セクション区切りの処理
-            elif processor.is_section_divider(paragraph):
-                html_parts.append(self._convert_section_divider(paragraph, processor))
-            # 表の処理
-            elif processor.is_table(paragraph):
-                html_parts.append(self._convert_table(paragraph, processor))
-            # 定義リストの処理
-            elif processor.is_definition_list(paragraph):
-                html_parts.append(self._convert_definition_list(paragraph, processor))
-            # 箇条書きの処理
-            elif processor.is_bullet_list(paragraph):
-                html_parts.append(self._convert_bullet_list(paragraph, processor))
-            # NPCステータスの処理
-            elif processor.is_npc_status(paragraph):
-                html_parts.append(self._convert_npc_status(paragraph, processor))
-            # 会話文の処理
-            elif processor.has_dialogue(paragraph):
-                html_parts.append(self._convert_dialogue(paragraph, processor))
-            # 通常の段落
+            elif kind == 'numbered_heading':
+                # 判定時のマッチ結果（キャッシュ済み）からレベルを再利用
+                yield convert_numbered_heading(paragraph, heading_ids, heading_level(paragraph))
+            # 区切り線・表・リスト・NPCステータス・会話文
             else:
-                processed_paragraph = processor.process_coc_elements(paragraph)
-                html_parts.append(f'        <p>{processed_paragraph}</p>')
-        
-        return '\n'.join(html_parts)
+                yield converters[kind](paragraph, processor)
     
     def _convert_heading(self, paragraph: str, heading_ids: Dict = None) -> str:
         """見出しをHTMLに変換"""
@@ -135,22 +190,21 @@ class HTMLGenerator:
         
         return f'        <h{level}{heading_id}>{self._escape_html(heading_text)}</h{level}>'
     
-    def _convert_numbered_heading(self, paragraph: str, heading_ids: Dict = None) -> str:
-        """番号付き見出しをHTMLに変換"""
-        # 見出しレベルの判定（簡略化）
-        if re.match(r'^\d+\.', paragraph):
-            level = 1
-        elif re.match(r'^\d+-\d+\.', paragraph):
-            level = 2
-        elif re.match(r'^\d+-\d+-\d+\.', paragraph):
-            level = 3
-        else:
-            level = 2
+    def _convert_numbered_heading(self, paragraph: str, heading_ids: Dict = None, level: Optional[int] = None) -> str:
+        """番号付き見出しをHTMLに変換（levelが渡された場合は再判定しない）"""
+        if level is None:
+            # 見出しレベルの判定（ハイフンの数で判定）
+            match = _NUMBERED_LEVEL_RE.match(paragraph)
+            if match:
+                level = match.group().count('-') + 1
+            else:
+                level = 2
         
         # IDを取得
         heading_id = ""
-        if heading_ids and paragraph.strip() in heading_ids:
-            heading_id = f' id="{heading_ids[paragraph.strip()]}"'
+        key = paragraph.strip()
+        if heading_ids and key in heading_ids:
+            heading_id = f' id="{heading_ids[key]}"'
         
         return f'        <h{level}{heading_id}>{self._escape_html(paragraph)}</h{level}>'
     
@@ -158,13 +212,14 @@ class HTMLGenerator:
         """セクション区切りをHTMLに変換"""
         lines = paragraph.strip().split('\n')
         html_parts = []
+        process = processor.process_coc_elements
         
         for line in lines:
             line = line.strip()
-            if line.startswith('===') or line.startswith('---'):
+            if line.startswith(('===', '---')):
                 html_parts.append('        <hr class="section-divider">')
             elif line:
-                processed_line = processor.process_coc_elements(line)
+                processed_line = process(line)
                 html_parts.append(f'        <p>{processed_line}</p>')
         
         return '\n'.join(html_parts)
@@ -189,38 +244,41 @@ class HTMLGenerator:
                     body_lines.append(line)
         
         # テーブルHTML生成
-        html = '        <table class="scenario-table">\n'
+        html_parts = ['        <table class="scenario-table">']
+        
+        process = processor.process_coc_elements
         
         # ヘッダー処理
         if header_lines:
-            html += '            <thead>\n'
-            html += '                <tr>\n'
-            cells = [cell.strip() for cell in header_lines[0].split('|') if cell.strip()]
-            for cell in cells:
-                processed_cell = processor.process_coc_elements(cell)
-                html += f'                    <th>{processed_cell}</th>\n'
-            html += '                </tr>\n'
-            html += '            </thead>\n'
+            html_parts.append('            <thead>')
+            html_parts.append('                <tr>')
+            html_parts.extend(
+                f'                    <th>{process(cell)}</th>'
+                for cell in map(str.strip, header_lines[0].split('|')) if cell
+            )
+            html_parts.append('                </tr>')
+            html_parts.append('            </thead>')
         
         # ボディ処理
         if body_lines:
-            html += '            <tbody>\n'
+            html_parts.append('            <tbody>')
             for line in body_lines:
-                html += '                <tr>\n'
-                cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-                for cell in cells:
-                    processed_cell = processor.process_coc_elements(cell)
-                    html += f'                    <td>{processed_cell}</td>\n'
-                html += '                </tr>\n'
-            html += '            </tbody>\n'
-        
-        html += '        </table>'
-        return html
+                html_parts.append('                <tr>')
+                html_parts.extend(
+                    f'                    <td>{process(cell)}</td>'
+                    for cell in map(str.strip, line.split('|')) if cell
+                )
+                html_parts.append('                </tr>')
+            html_parts.append('            </tbody>')
+        
+        html_parts.append('        </table>')
+        return '\n'.join(html_parts)
     
     def _convert_definition_list(self, paragraph: str, processor) -> str:
         """定義リストをHTMLに変換"""
         lines = paragraph.strip().split('\n')
-        html = '        <dl class="scenario-definitions">\n'
+        html_parts = ['        <dl class="scenario-definitions">']
+        process = processor.process_coc_elements
         
         for line in lines:
             line = line.strip()
@@ -237,41 +295,43 @@ class HTMLGenerator:
                 term = term.strip()
                 description = description.strip()
                 
-                processed_term = processor.process_coc_elements(term)
-                processed_desc = processor.process_coc_elements(description) if description else ''
+                processed_term = process(term)
+                processed_desc = process(description) if description else ''
                 
-                html += f'            <dt>{processed_term}</dt>\n'
+                html_parts.append(f'            <dt>{processed_term}</dt>')
                 if processed_desc:
-                    html += f'            <dd>{processed_desc}</dd>\n'
+                    html_parts.append(f'            <dd>{processed_desc}</dd>')
             elif line:
-                processed_line = processor.process_coc_elements(line)
-                html += f'            <p>{processed_line}</p>\n'
+                processed_line = process(line)
+                html_parts.append(f'            <p>{processed_line}</p>')
         
-        html += '        </dl>'
-        return html
+        html_parts.append('        </dl>')
+        return '\n'.join(html_parts)
     
     def _convert_bullet_list(self, paragraph: str, processor) -> str:
         """箇条書きをHTMLに変換"""
         lines = paragraph.strip().split('\n')
-        html = '        <ul class="scenario-bullets">\n'
+        html_parts = ['        <ul class="scenario-bullets">']
+        process = processor.process_coc_elements
         
         for line in lines:
             line = line.strip()
             if line.startswith('・'):
                 content = line[1:].strip()
-                processed_content = processor.process_coc_elements(content)
-                html += f'            <li>{processed_content}</li>\n'
+                processed_content = process(content)
+                html_parts.append(f'            <li>{processed_content}</li>')
             elif line:
-                processed_line = processor.process_coc_elements(line)
-                html += f'            <p>{processed_line}</p>\n'
+                processed_line = process(line)
+                html_parts.append(f'            <p>{processed_line}</p>')
         
-        html += '        </ul>'
-        return html
+        html_parts.append('        </ul>')
+        return '\n'.join(html_parts)
     
     def _convert_npc_status(self, paragraph: str, processor) -> str:
         """NPCステータスをHTMLに変換"""
         lines = paragraph.strip().split('\n')
-        html = '        <div class="npc-status-block">\n'
+        html_parts = ['        <div class="npc-status-block">']
+        process = processor.process_coc_elements
         
         for line in lines:
             line = line.strip()
@@ -279,46 +339,46 @@ class HTMLGenerator:
                 continue
             
             # ステータス値を含む行
-            if re.search(r'\(.*(?:STR|CON|SIZ|INT|POW|DEX|HP).*\)', line):
-                match = re.match(r'^([^()]+?)\s*(\\(.*\\))(.*)$', line)
-                if match:
-                    npc_name = match.group(1).strip()
-                    stats = match.group(2).strip()
-                    other_info = match.group(3).strip()
-                    
-                    html += f'            <div class="npc-name">{processor.process_coc_elements(npc_name)}</div>\n'
-                    if other_info:
-                        html += f'            <div class="npc-note">{processor.process_coc_elements(other_info)}</div>\n'
-                    html += f'            <div class="npc-stats">{processor.process_coc_elements(stats)}</div>\n'
+            match = _NPC_LINE_RE.match(line) if '(' in line else None
+            if match:
+                npc_name = match.group(1).strip()
+                stats = match.group(2).strip()
+                other_info = match.group(3).strip()
+                
+                html_parts.append(f'            <div class="npc-name">{process(npc_name)}</div>')
+                if other_info:
+                    html_parts.append(f'            <div class="npc-note">{process(other_info)}</div>')
+                html_parts.append(f'            <div class="npc-stats">{process(stats)}</div>')
             
             # 技能行
-            elif line.startswith('技能:') or '技能:' in line:
-                skills_content = re.sub(r'^.*?技能:\s*', '', line)
-                html += f'            <div class="npc-skills"><strong>技能:</strong> {processor.process_coc_elements(skills_content)}</div>\n'
+            elif '技能:' in line:
+                # 最初の「技能:」より後ろを取り出す
+                skills_content = line.partition('技能:')[2].lstrip()
+                html_parts.append(f'            <div class="npc-skills"><strong>技能:</strong> {process(skills_content)}</div>')
             
             # 装備行
-            elif line.startswith('装備:') or '装備:' in line:
-                equipment_content = re.sub(r'^.*?装備:\s*', '', line)
-                html += f'            <div class="npc-equipment"><strong>装備:</strong> {processor.process_coc_elements(equipment_content)}</div>\n'
+            elif '装備:' in line:
+                equipment_content = line.partition('装備:')[2].lstrip()
+                html_parts.append(f'            <div class="npc-equipment"><strong>装備:</strong> {process(equipment_content)}</div>')
             
             # 攻撃手段
-            elif re.search(r'(噛みつき|爪|ダメージ|\d+d\d+)', line):
-                html += f'            <div class="npc-attacks"><strong>攻撃:</strong> {processor.process_coc_elements(line)}</div>\n'
+            elif _NPC_ATTACK_RE.search(line):
+                html_parts.append(f'            <div class="npc-attacks"><strong>攻撃:</strong> {process(line)}</div>')
             
             # その他の情報
             else:
                 if line.strip():
-                    html += f'            <div class="npc-other">{processor.process_coc_elements(line)}</div>\n'
+                    html_parts.append(f'            <div class="npc-other">{process(line)}</div>')
         
-        html += '        </div>'
-        return html
+        html_parts.append('        </div>')
+        return '\n'.join(html_parts)
     
     def _convert_dialogue(self, paragraph: str, processor) -> str:
         """会話文をHTMLに変換"""
-        dialogue_pattern = re.compile(r'「([^」]+)」')
-        converted = dialogue_pattern.sub(
+        # エスケープとTRPG記法の処理は1回の走査（キャッシュ付き）で済ませ、その結果に会話文のspanを付与
+        converted = _DIALOGUE_RE.sub(
             r'<span class="dialogue">「\1」</span>',
-            paragraph
+            processor.process_coc_elements(paragraph)
         )
         return f'        <p class="dialogue-paragraph">{converted}</p>'
     
@@ -327,74 +387,49 @@ class HTMLGenerator:
         if not validation_report or len(validation_report.results) == 0:
             return ""
         
-        html = '        <div class="validation-report">\n'
-        html += '            <h2 class="validation-title">📋 記法チェック結果</h2>\n'
+        html_parts = [
+            '        <div class="validation-report">',
+            '            <h2 class="validation-title">📋 記法チェック結果</h2>',
+        ]
         
         # サマリー表示
         summary = validation_report.summary
         if summary["critical"] > 0:
-            html += f'            <div class="validation-summary critical">🚨 重大エラー: {summary["critical"]}個</div>\n'
+            html_parts.append(f'            <div class="validation-summary critical">🚨 重大エラー: {summary["critical"]}個</div>')
         if summary["warning"] > 0:
-            html += f'            <div class="validation-summary warning">⚠️ 警告: {summary["warning"]}個</div>\n'
+            html_parts.append(f'            <div class="validation-summary warning">⚠️ 警告: {summary["warning"]}個</div>')
         if summary["info"] > 0:
-            html += f'            <div class="validation-summary info">ℹ️ 情報: {summary["info"]}個</div>\n'
+            html_parts.append(f'            <div class="validation-summary info">ℹ️ 情報: {summary["info"]}個</div>')
         if summary["suggestion"] > 0:
-            html += f'            <div class="validation-summary suggestion">💡 提案: {summary["suggestion"]}個</div>\n'
+            html_parts.append(f'            <div class="validation-summary suggestion">💡 提案: {summary["suggestion"]}個</div>')
         
         # 詳細結果
         if validation_report.results:
-            html += '            <div class="validation-details">\n'
+            html_parts.append('            <div class="validation-details">')
+            escape = _html_escape
             for result in validation_report.results:
                 level_class = result.level.value
                 line_info = f"{result.line_number}行目: " if result.line_number else ""
                 
-                html += f'                <div class="validation-item {level_class}">\n'
-                html += f'                    <div class="validation-message">{line_info}{self._escape_html(result.message)}</div>\n'
+                html_parts.append(f'                <div class="validation-item {level_class}">')
+                html_parts.append(f'                    <div class="validation-message">{line_info}{escape(result.message)}</div>')
                 
                 if result.suggestion:
-                    html += f'                    <div class="validation-suggestion">💡 {self._escape_html(result.suggestion)}</div>\n'
+                    html_parts.append(f'                    <div class="validation-suggestion">💡 {escape(result.suggestion)}</div>')
                 
                 if result.proposed_fix:
-                    html += f'                    <div class="validation-fix">✏️ 修正案: {self._escape_html(result.proposed_fix)}</div>\n'
+                    html_parts.append(f'                    <div class="validation-fix">✏️ 修正案: {escape(result.proposed_fix)}</div>')
                 
-                html += '                </div>\n'
-            html += '            </div>\n'
+                html_parts.append('                </div>')
+            html_parts.append('            </div>')
         
-        html += '        </div>'
-        return html
+        html_parts.append('        </div>')
+        return '\n'.join(html_parts)
     
     def _escape_html(self, text: str) -> str:
         """HTMLエスケープ処理"""
-        import html
-        return html.escape(text, quote=True)
+        return _html_escape(text, quote=True)
     
     def _load_default_css(self) -> str:
-        """デフォルトCSSを読み込み"""
-        css_path = Path(__file__).parent.parent / 'templates' / 'style.css'
-        
-        if css_path.exists():
-            try:
-                with open(css_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except Exception:
-                pass
-        
-        # フォールバック用の基本CSS
-        return """
-        body {
-            font-family: "Noto Sans JP", "Hiragino Kaku Gothic ProN", "Meiryo", sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background-color: #f9f9f9;
-            margin: 0;
-            padding: 20px;
-        }
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-            background-color: white;
-            padding: 40px;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }
-        """
\ No newline at end of file
+        """デフォルトCSSを読み込み（設定モジュールと共有のキャッシュ・フォールバックを使用）"""
+        return load_default_css()
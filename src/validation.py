@@ -5,11 +5,19 @@ TRPGシナリオの記法を検証し、適切なフィードバックを提供
 
 from enum import Enum
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from abc import ABC, abstractmethod
 import re
 
 
+# 記法検出用の正規表現（モジュール読み込み時に1度だけコンパイル）
+_SKILL_RE = re.compile(r'【([^】]+)】')
+_DICE_RE = re.compile(r'(\d+)d(\d+)(?:([+\-])(\d+))?', re.IGNORECASE)
+# 番号付き見出し（1. / 1-1. / 1-1-1.）の階層を1回のmatchで判定
+_HEADING_LEVEL_RE = re.compile(r'^\d+(?:-(\d+)(?:-(\d+))?)?\.')
+_HEADING_NUM4_RE = re.compile(r'^\d+-\d+-\d+-')
+
+
 class ValidationLevel(Enum):
     """バリデーション結果のレベル"""
     CRITICAL = "critical"    # 重大エラー（変換不可能）
@@ -18,7 +26,7 @@ class ValidationLevel(Enum):
     SUGGESTION = "suggestion"  # 提案（より良い書き方）
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """バリデーション結果"""
     level: ValidationLevel
@@ -31,7 +39,7 @@ class ValidationResult:
     proposed_fix: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationConfig:
     """バリデーション設定"""
     strict_mode: bool = False
@@ -49,6 +57,8 @@ class ValidationConfig:
 class ValidationReport:
     """バリデーション結果の集約レポート"""
     
+    __slots__ = ('results', 'summary')
+    
     def __init__(self):
         self.results: List[ValidationResult] = []
         self.summary: Dict[str, int] = {
@@ -144,7 +154,7 @@ class ValidationEngine:
         """ドキュメント全体をバリデーション"""
         report = ValidationReport()
         
-        # 行ごとに分割して処理
+        # 行ごとに分割して処理（構造チェックでも同じ行リストを使う）
         lines = content.split('\n')
         for line_number, line in enumerate(lines, 1):
             line_results = self.validate_line(line, line_number)
@@ -152,7 +162,7 @@ class ValidationEngine:
                 report.add_result(result)
         
         # ドキュメント全体の構造チェック
-        document_results = self._validate_document_structure(content)
+        document_results = self._validate_document_structure(lines)
         for result in document_results:
             report.add_result(result)
         
@@ -183,13 +193,12 @@ class ValidationEngine:
         
         return results
     
-    def _validate_document_structure(self, content: str) -> List[ValidationResult]:
-        """ドキュメント構造の検証"""
+    def _validate_document_structure(self, lines: List[str]) -> List[ValidationResult]:
+        """ドキュメント構造の検証（行分割済みのドキュメントを受け取る）"""
         results = []
         
         # 見出しの階層チェック
         heading_levels = []
-        lines = content.split('\n')
         
         for line_number, line in enumerate(lines, 1):
             line = line.strip()
@@ -200,13 +209,11 @@ class ValidationEngine:
                 heading_levels.append((level, line_number))
             
             # 番号付き見出し
-            elif re.match(r'^\d+\.', line):
-                level = 1
-                if re.match(r'^\d+-\d+\.', line):
-                    level = 2
-                elif re.match(r'^\d+-\d+-\d+\.', line):
-                    level = 3
-                heading_levels.append((level, line_number))
+            else:
+                match = _HEADING_LEVEL_RE.match(line)
+                if match:
+                    level = 1 + (match.group(1) is not None) + (match.group(2) is not None)
+                    heading_levels.append((level, line_number))
         
         # 見出し階層の妥当性チェック
         if heading_levels:
@@ -225,6 +232,20 @@ class ValidationEngine:
         return results
 
 
+def _base_skill_name(skill_name: str) -> str:
+    """技能名から末尾の修正値（+20/-10）と「or」以降を除いた基本技能名を取得"""
+    # 末尾の数字列の直前が符号なら、符号ごと修正値として除去
+    end = len(skill_name)
+    while end and skill_name[end - 1].isdecimal():
+        end -= 1
+    if end < len(skill_name) and end and skill_name[end - 1] in '+-':
+        skill_name = skill_name[:end - 1]
+    
+    # or以降を除去（orの後ろに何もない場合はそのまま）
+    head, _, tail = skill_name.partition('or')
+    return head if tail else skill_name
+
+
 # 共通の技能リスト（CoC6版）
 COC6_SKILLS = [
     "目星", "聞き耳", "図書館", "説得", "信用", "隠れる", "忍び歩き",
@@ -236,34 +257,53 @@ COC6_SKILLS = [
     "こぶし", "頭突き", "投擲", "マーシャルアーツ", "剣道", "拳銃",
     "サブマシンガン", "ショットガン", "マシンガン", "ライフル"
 ]
+_COC6_SKILL_SET = frozenset(COC6_SKILLS)
 
 
 class SkillValidator(BaseValidator):
     """技能記法バリデータ"""
     
+    def __init__(self, config: ValidationConfig):
+        super().__init__(config)
+        self._custom_skills = None
+        self._refresh_skills()
+    
+    def _refresh_skills(self):
+        """config.custom_skillsが変更されていれば技能の一覧と集合を作り直す"""
+        custom_skills = self.config.custom_skills
+        if custom_skills == self._custom_skills:
+            return
+        # 比較用の複製と、類似技能の検索順を保つタプル、所属判定用の集合
+        self._custom_skills = list(custom_skills)
+        self._skill_list = (*COC6_SKILLS, *custom_skills)
+        self._skill_set = _COC6_SKILL_SET.union(custom_skills)
+    
     def get_name(self) -> str:
         return "SkillValidator"
     
     def validate(self, text: str, line_number: int = None) -> List[ValidationResult]:
         results = []
         
+        # 【がない行では正規表現を実行しない
+        if '【' not in text:
+            return results
+        
+        # 設定の技能リストは共有されているため、検証時点の内容を反映
+        self._refresh_skills()
+        
         # 【技能名】パターンを検索
-        skill_pattern = r'【([^】]+)】'
-        matches = re.finditer(skill_pattern, text)
+        matches = _SKILL_RE.finditer(text)
         
         for match in matches:
             skill_name = match.group(1)
             
-            # 修正値を除去して基本技能名を取得
-            base_skill = re.sub(r'[+\-]\d+$', '', skill_name)
-            base_skill = re.sub(r'or.+$', '', base_skill)  # or以降を除去
+            # 修正値とor以降を除去して基本技能名を取得
+            base_skill = _base_skill_name(skill_name)
             
             # 技能名チェック
-            all_skills = COC6_SKILLS + self.config.custom_skills
-            
-            if base_skill not in all_skills:
+            if base_skill not in self._skill_set:
                 # 類似技能名の提案
-                suggestion = self._find_similar_skill(base_skill, all_skills)
+                suggestion = self._find_similar_skill(base_skill, self._skill_list)
                 suggestion_text = f"【{suggestion}】でしょうか？" if suggestion else "標準技能名を確認してください"
                 
                 results.append(self._create_result(
@@ -278,22 +318,26 @@ class SkillValidator(BaseValidator):
         
         return results
     
-    def _find_similar_skill(self, input_skill: str, skill_list: List[str]) -> Optional[str]:
+    def _find_similar_skill(self, input_skill: str, skill_list: Sequence[str]) -> Optional[str]:
         """類似技能名を検索"""
         # 簡単な類似度計算（レーベンシュタイン距離の簡易版）
         best_match = None
         best_score = float('inf')
         
+        input_length = len(input_skill)
         for skill in skill_list:
-            score = self._simple_distance(input_skill, skill)
+            # 距離は文字数の差以上になるので、差が2を超える候補は計算しない
+            if abs(input_length - len(skill)) > 2:
+                continue
+            score = self._simple_distance(input_skill, skill, max_dist=2)
             if score < best_score and score <= 2:  # 2文字以内の差
                 best_score = score
                 best_match = skill
         
         return best_match
     
-    def _simple_distance(self, s1: str, s2: str) -> int:
-        """簡易的な文字列距離計算"""
+    def _simple_distance(self, s1: str, s2: str, max_dist: Optional[int] = None) -> int:
+        """簡易的な文字列距離計算（max_distを超えると分かった時点でmax_dist + 1を返す）"""
         if len(s1) > len(s2):
             s1, s2 = s2, s1
         
@@ -305,6 +349,9 @@ class SkillValidator(BaseValidator):
                     new_distances.append(distances[index1])
                 else:
                     new_distances.append(1 + min((distances[index1], distances[index1 + 1], new_distances[-1])))
+            # 行の最小値は以降の行で減らないため、上限を超えたら打ち切る
+            if max_dist is not None and min(new_distances) > max_dist:
+                return max_dist + 1
             distances = new_distances
         
         return distances[-1]
@@ -344,8 +391,8 @@ class HeadingValidator(BaseValidator):
                 ))
         
         # 番号付き見出し
-        elif re.match(r'^\d+', line):
-            if re.match(r'^\d+-\d+-\d+-', line):
+        elif line[:1].isdigit():
+            if _HEADING_NUM4_RE.match(line):
                 results.append(self._create_result(
                     level=ValidationLevel.INFO,
                     message="見出し階層が深すぎます（3階層まで推奨）",
@@ -366,9 +413,12 @@ class DiceValidator(BaseValidator):
     def validate(self, text: str, line_number: int = None) -> List[ValidationResult]:
         results = []
         
+        # d/Dを含まない行にはダイス記法が存在しない
+        if 'd' not in text and 'D' not in text:
+            return results
+        
         # ダイス記法パターン
-        dice_pattern = r'(\d+)d(\d+)(?:([+\-])(\d+))?'
-        matches = re.finditer(dice_pattern, text, re.IGNORECASE)
+        matches = _DICE_RE.finditer(text)
         
         for match in matches:
             dice_count = int(match.group(1))
@@ -2,6 +2,7 @@
 converter.pyのテストコード
 """
 
+import codecs
 import unittest
 import tempfile
 import shutil
@@ -16,6 +17,10 @@ except ImportError:
     DOCX_AVAILABLE = False
 
 from src.converter import ScriptConverter
+from src.config import ScriptWeaverConfig, _read_css, load_default_css
+from src.content_processor import ContentProcessor
+from src.html_generator import HTMLGenerator
+from src.converter_refactored import ScriptConverter as RefactoredConverter, convert_many
 
 
 class TestScriptConverter:
@@ -31,6 +36,8 @@ class TestScriptConverter:
         """各テストメソッド実行後のクリーンアップ"""
         if self.temp_dir.exists():
             shutil.rmtree(self.temp_dir)
+        # モックしたCSSの読み込み結果が他のテストに残らないようにする
+        _read_css.cache_clear()
     
     def test_init(self):
         """初期化テスト"""
@@ -93,6 +100,97 @@ class TestScriptConverter:
         with pytest.raises(ValueError, match="対応していない形式"):
             self.converter.convert(unsupported_file)
     
+    def test_convert_generation_error_keeps_existing_output(self):
+        """HTML生成中のエラーで既存の出力ファイルが壊れないことのテスト"""
+        txt_file = self.temp_dir / "test.txt"
+        txt_file.write_text("# タイトル\n\n本文", encoding='utf-8')
+        output_file = txt_file.with_suffix('.html')
+        output_file.write_text("previous output", encoding='utf-8')
+        
+        with patch('src.html_generator.HTMLGenerator._generate_toc', side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError, match="boom"):
+                self.converter.convert(txt_file)
+        
+        # 生成元のエラーがそのまま伝わり、既存の出力と一時ファイルは残らない
+        assert output_file.read_text(encoding='utf-8') == "previous output"
+        assert sorted(p.name for p in self.temp_dir.iterdir()) == ["test.html", "test.txt"]
+    
+    def test_convert_write_error(self):
+        """出力ファイルの書き込み失敗テスト"""
+        txt_file = self.temp_dir / "test.txt"
+        txt_file.write_text("# タイトル\n\n本文", encoding='utf-8')
+        # 出力先と同名のディレクトリがあると置き換えに失敗する
+        txt_file.with_suffix('.html').mkdir()
+        
+        with pytest.raises(IOError, match="HTMLファイルの書き込みに失敗しました"):
+            self.converter.convert(txt_file)
+        
+        assert sorted(p.name for p in self.temp_dir.iterdir()) == ["test.html", "test.txt"]
+    
+    def test_convert_many(self):
+        """複数ファイルの並列変換テスト"""
+        input_files = []
+        for i in range(3):
+            txt_file = self.temp_dir / f"test{i}.txt"
+            txt_file.write_text(f"# タイトル{i}\n\n【目星】で発見する。", encoding='utf-8')
+            input_files.append(txt_file)
+        
+        output_files = convert_many(input_files, max_workers=2)
+        
+        # 入力と同じ順序で出力パスが返る
+        assert output_files == [f.with_suffix('.html') for f in input_files]
+        for i, output_file in enumerate(output_files):
+            html_content = output_file.read_text(encoding='utf-8')
+            assert f'>タイトル{i}</h1>' in html_content
+            assert '<span class="coc-skill">【目星】</span>' in html_content
+    
+    def test_convert_many_method_uses_converter_config(self):
+        """コンバータの設定を引き継いだ並列変換テスト"""
+        input_files = []
+        for i in range(4):
+            txt_file = self.temp_dir / f"scene{i}.txt"
+            txt_file.write_text(f"# シーン{i}\n\n1d100を振る。", encoding='utf-8')
+            input_files.append(txt_file)
+        
+        converter = RefactoredConverter()
+        converter.update_config(enable_validation=False)
+        output_files = converter.convert_many(input_files, max_workers=2)
+        
+        assert output_files == [f.with_suffix('.html') for f in input_files]
+        for i, output_file in enumerate(output_files):
+            html_content = output_file.read_text(encoding='utf-8')
+            assert f'>シーン{i}</h1>' in html_content
+            assert '<span class="coc-dice">1d100</span>' in html_content
+    
+    def test_convert_many_method_single_file_uses_instance(self):
+        """1ファイルの並列変換がインスタンス自身で変換されることのテスト"""
+        txt_file = self.temp_dir / "scene.txt"
+        txt_file.write_text("# シーン\n\n本文", encoding='utf-8')
+        
+        converter = RefactoredConverter()
+        converter.update_config(enable_validation=False)
+        with patch.object(converter, 'convert', wraps=converter.convert) as mock_convert:
+            output_files = converter.convert_many([txt_file])
+        
+        mock_convert.assert_called_once_with(txt_file, False)
+        assert output_files == [txt_file.with_suffix('.html')]
+    
+    def test_convert_many_method_rejects_custom_validators(self):
+        """標準以外のバリデータが登録されている場合の並列変換テスト"""
+        input_files = []
+        for i in range(2):
+            txt_file = self.temp_dir / f"scene{i}.txt"
+            txt_file.write_text(f"# シーン{i}", encoding='utf-8')
+            input_files.append(txt_file)
+        
+        converter = RefactoredConverter()
+        converter.update_config(enable_validation=True)
+        converter.validation_engine.register_validator(MagicMock())
+        
+        with pytest.raises(ValueError, match="標準以外のバリデータ"):
+            converter.convert_many(input_files, max_workers=2)
+        assert not any(f.with_suffix('.html').exists() for f in input_files)
+    
     def test_read_text_file(self):
         """テキストファイル読み込みテスト"""
         txt_file = self.temp_dir / "test.txt"
@@ -102,6 +200,46 @@ class TestScriptConverter:
         result = self.converter._read_text_file(txt_file)
         assert result == content
     
+    def test_read_text_file_shift_jis_crlf(self):
+        """Shift_JIS・CRLF改行のテキストファイル読み込みテスト"""
+        txt_file = self.temp_dir / "test_sjis.txt"
+        txt_file.write_bytes("探索者は【目星】で手がかりを発見した。\r\n改行あり".encode('shift_jis'))
+        
+        result = self.converter._read_text_file(txt_file)
+        assert result == "探索者は【目星】で手がかりを発見した。\n改行あり"
+    
+    @pytest.mark.parametrize('encoding', ['utf-8-sig', 'utf-16', 'utf-16-be', 'utf-32', 'utf-32-be'])
+    def test_read_text_file_with_bom(self, encoding):
+        """BOM付きテキストファイル読み込みテスト"""
+        txt_file = self.temp_dir / "test_bom.txt"
+        content = "探索者は【目星】で手がかりを発見した。\n改行あり"
+        raw = content.encode(encoding)
+        if encoding == 'utf-16-be':
+            raw = codecs.BOM_UTF16_BE + raw
+        elif encoding == 'utf-32-be':
+            raw = codecs.BOM_UTF32_BE + raw
+        txt_file.write_bytes(raw)
+        
+        result = self.converter._read_text_file(txt_file)
+        assert result == content
+    
+    def test_read_text_file_iso_2022_jp(self):
+        """ISO-2022-JP（7bitエンコーディング）のテキストファイル読み込みテスト"""
+        txt_file = self.temp_dir / "test_jis.txt"
+        content = "探索者は図書館で古い日記を見つけた。\n【図書館】に成功すると、日記の内容が分かる。"
+        txt_file.write_bytes(content.encode('iso-2022-jp'))
+        
+        result = self.converter._read_text_file(txt_file)
+        assert result == content
+    
+    def test_read_text_file_utf16_without_bom(self):
+        """BOMなしUTF-16-LE（ASCII文字のみ）のテキストファイル読み込みテスト"""
+        txt_file = self.temp_dir / "test_utf16.txt"
+        txt_file.write_bytes("Chapter 1\r\nThe investigators arrive.".encode('utf-16-le'))
+        
+        result = self.converter._read_text_file(txt_file)
+        assert result == "Chapter 1\nThe investigators arrive."
+    
     @patch('src.file_reader.Document')
     def test_read_docx_file(self, mock_document):
         """docxファイル読み込みテスト"""
@@ -176,6 +314,45 @@ class TestScriptConverter:
         assert 'dialogue-paragraph' in result
         assert '<span class="dialogue">「こんにちは」</span>' in result
     
+    def test_convert_dialogue_escapes_and_processes_notation(self):
+        """会話文のHTMLエスケープとTRPG記法処理テスト"""
+        paragraph = "彼は「<b>で【目星】」と言った。"
+        result = self.converter._convert_dialogue(paragraph)
+        
+        assert '<b>' not in result
+        assert '<span class="dialogue">「&lt;b&gt;で<span class="coc-skill">【目星】</span>」</span>' in result
+    
+    def test_convert_npc_status(self):
+        """NPCステータス変換テスト"""
+        paragraph = "田中一郎 (STR 12 CON 14 HP 12) 館の主人\n技能: 【目星】60%"
+        assert self.converter._is_npc_status(paragraph)
+        result = self.converter._convert_npc_status(paragraph)
+        
+        assert '<div class="npc-name">田中一郎</div>' in result
+        assert '<div class="npc-note">館の主人</div>' in result
+        assert '<div class="npc-stats">(STR 12 CON 14 HP 12)</div>' in result
+        assert '<strong>技能:</strong> <span class="coc-skill">【目星】</span>60%' in result
+    
+    def test_convert_npc_status_trailing_parentheses(self):
+        """ステータス括弧の後ろに別の括弧がある場合のNPC変換テスト"""
+        paragraph = "グール (STR 16 CON 13) 地下墓地 (夜のみ)"
+        result = self.converter._convert_npc_status(paragraph)
+        
+        assert '<div class="npc-stats">(STR 16 CON 13)</div>' in result
+        assert '<div class="npc-note">地下墓地 (夜のみ)</div>' in result
+    
+    def test_coc_cache_size_from_config(self):
+        """CoC記法変換キャッシュのサイズが設定に従うことのテスト"""
+        config = self.converter._converter.config
+        processor = self.converter._converter.content_processor
+        for text in ("【目星】", "1d6", "『鍵』", "【目星】"):
+            processor.process_coc_elements(text)
+        
+        cache_info = processor._process_coc_cached.cache_info()
+        assert cache_info.maxsize == config.regex_cache_size
+        assert cache_info.currsize == 3
+        assert cache_info.hits == 1
+    
     def test_escape_html(self):
         """HTMLエスケープテスト"""
         text = "<script>alert('test');</script> & \"quote\" 'single'"
@@ -191,6 +368,7 @@ class TestScriptConverter:
     def test_load_css_template_with_file(self, mock_exists):
         """CSSテンプレート読み込みテスト（ファイルあり）"""
         mock_exists.return_value = True
+        _read_css.cache_clear()
         
         converter = ScriptConverter()
         assert converter.css_template == "test css content"
@@ -199,11 +377,43 @@ class TestScriptConverter:
     def test_load_css_template_without_file(self, mock_exists):
         """CSSテンプレート読み込みテスト（ファイルなし）"""
         mock_exists.return_value = False
+        _read_css.cache_clear()
         
         converter = ScriptConverter()
         assert 'body {' in converter.css_template
         assert 'font-family:' in converter.css_template
     
+    @patch('pathlib.Path.exists')
+    def test_html_generator_default_css_without_file(self, mock_exists):
+        """HTMLGeneratorのデフォルトCSSが設定と同じフォールバックを使うことのテスト"""
+        mock_exists.return_value = False
+        _read_css.cache_clear()
+        
+        generator = HTMLGenerator()
+        assert generator.css_template == load_default_css()
+        assert generator.css_template == ScriptConverter().css_template
+    
+    def test_css_template_read_once(self):
+        """CSSテンプレートが同一パスにつき1回だけ読み込まれることのテスト"""
+        _read_css.cache_clear()
+        
+        with patch('builtins.open', mock_open(read_data="cached css")) as mocked_open:
+            first = ScriptConverter()
+            second = ScriptConverter()
+            assert first.css_template == "cached css"
+            assert second.css_template == "cached css"
+        
+        mocked_open.assert_called_once()
+    
+    def test_css_template_created_after_miss(self):
+        """読み込めなかったCSSテンプレートが後から作成された場合に読み込まれることのテスト"""
+        css_file = self.temp_dir / "custom.css"
+        config = ScriptWeaverConfig(css_template_path=css_file)
+        assert config.load_css_template() == config._get_fallback_css()
+        
+        css_file.write_text("body { color: red; }", encoding='utf-8')
+        assert config.load_css_template() == "body { color: red; }"
+    
     def test_sample_scenario_conversion(self):
         """サンプルシナリオ変換テスト"""
         # サンプルファイルのパス
@@ -389,6 +599,25 @@ class TestScriptConverter:
         # HTMLエスケープも適用されていることを確認
         assert '&lt;' not in result  # この例では特殊文字がないため
     
+    def test_process_coc_elements_no_nested_spans(self):
+        """CoC6版要素が入れ子のspanにならないことのテスト"""
+        result = self.converter._process_coc_elements("SANc1/1d4+1と『2d6の剣』")
+        
+        assert result == (
+            '<span class="coc-san">SANc1/1d4+1</span>と'
+            '<span class="coc-item">『2d6の剣』</span>'
+        )
+    
+    def test_process_coc_elements_without_markers(self):
+        """記法を含まないテキストとダイス表記のないSAN記法のテスト"""
+        # 記法がなければエスケープのみ
+        result = self.converter._process_coc_elements("古い洋館に<到着>した。")
+        assert result == "古い洋館に&lt;到着&gt;した。"
+        
+        # 「d」を含まないSAN記法も変換される
+        result = self.converter._process_coc_elements("SAN0/1の減少")
+        assert result == '<span class="coc-san">SAN0/1</span>の減少'
+    
     def test_coc_elements_in_paragraph_conversion(self):
         """段落変換でのCoC6版要素テスト"""
         content = """1. 調査開始
@@ -501,4 +730,64 @@ class TestScriptConverter:
         assert '<td>17:30</td>' in html_result
         
         # 通常段落の確認
-        assert '<p>通常の段落です。</p>' in html_result
\ No newline at end of file
+        assert '<p>通常の段落です。</p>' in html_result
+
+
+class TestContentProcessorClassify:
+    """ContentProcessor.classifyのテスト"""
+    
+    # 種別ごとの代表的な段落
+    SAMPLES = {
+        'heading': "# 導入",
+        'numbered_heading': "1-1. 依頼",
+        'section_divider': "前半の本文\n===\n後半の本文",
+        'table': "時刻 | 出来事\n14:00 | 到着\n17:30 | 出発",
+        'definition_list': "◆依頼人：田中一郎\n◆報酬：10万円",
+        'bullet_list': "・懐中電灯\n・ロープ",
+        'npc_status': "田中一郎 (STR 12 CON 14 HP 12)\n技能: 【目星】60%",
+        'dialogue': "「ここはどこだ？」と彼は言った。",
+        'paragraph': "探索者は【目星】で1d6の手がかりを得る。",
+    }
+    
+    def setup_method(self):
+        self.processor = ContentProcessor()
+    
+    def _classify_with_predicates(self, paragraph):
+        """is_*判定をレンダリングの優先順位で適用した結果"""
+        processor = self.processor
+        if paragraph.startswith('#'):
+            return 'heading'
+        if processor._is_numbered_heading(paragraph):
+            return 'numbered_heading'
+        for kind, predicate in (
+            ('section_divider', processor.is_section_divider),
+            ('table', processor.is_table),
+            ('definition_list', processor.is_definition_list),
+            ('bullet_list', processor.is_bullet_list),
+            ('npc_status', processor.is_npc_status),
+            ('dialogue', processor.has_dialogue),
+        ):
+            if predicate(paragraph):
+                return kind
+        return 'paragraph'
+    
+    @pytest.mark.parametrize('kind', list(SAMPLES))
+    def test_classify_each_kind(self, kind):
+        """種別ごとの判定テスト"""
+        assert self.processor.classify(self.SAMPLES[kind]) == kind
+    
+    @pytest.mark.parametrize('paragraph', list(SAMPLES.values()) + [
+        # 複数の種別に該当する段落は優先順位の高いものになる
+        "・A | B\n・C | D",
+        "◆項目 | 値\n◆項目2 | 値2\n---",
+        "・田中 (STR 10)\n・佐藤 (CON 12)",
+        "田中 (STR 10)「こんにちは」",
+        # 1行だけのリストや表は通常の段落
+        "・項目",
+        "A | B",
+        "(メモ) 括弧だけ",
+    ])
+    def test_classify_matches_predicates(self, paragraph):
+        """classifyとis_*判定が同じ結果になることのテスト"""
+        assert self.processor.classify(paragraph) == self._classify_with_predicates(paragraph)
+
@@ -172,6 +172,24 @@ class TestSkillValidator:
         
         # カスタム技能として登録されているのでエラーなし
         assert len(results) == 0
+    
+    def test_custom_skills_added_after_construction(self):
+        """バリデータ作成後に追加したカスタム技能のテスト"""
+        text = "【カスタム技能】を使用"
+        assert len(self.validator.validate(text, 1)) == 1
+        
+        # 共有している設定へ追加した技能は以降の検証に反映される
+        self.config.custom_skills.append("カスタム技能")
+        assert len(self.validator.validate(text, 1)) == 0
+        
+        self.config.custom_skills = []
+        assert len(self.validator.validate(text, 1)) == 1
+    
+    def test_find_similar_skill(self):
+        """類似技能検索のテスト"""
+        assert self.validator._find_similar_skill("目だま", self.validator._skill_list) == "目星"
+        assert self.validator._find_similar_skill("コンピューター", self.validator._skill_list) == "コンピュータ"
+        assert self.validator._find_similar_skill("存在しない技能名", self.validator._skill_list) is None
 
 
 class TestHeadingValidator:
@@ -320,6 +338,21 @@ class TestValidationEngine:
         hierarchy_warnings = [r for r in report.results if "階層が飛んで" in r.message]
         assert len(hierarchy_warnings) >= 1
     
+    def test_numbered_heading_hierarchy_validation(self):
+        """番号付き見出しの階層判定"""
+        content = """1. 導入
+1-1. 依頼
+2. 調査
+2-1-1. 階層が飛んでいる見出し
+"""
+        
+        report = self.engine.validate_document(content)
+        
+        hierarchy_warnings = [r for r in report.results if r.code == "HEADING_HIERARCHY"]
+        assert len(hierarchy_warnings) == 1
+        assert hierarchy_warnings[0].line_number == 4
+        assert "レベル1の次にレベル3" in hierarchy_warnings[0].message
+    
     def test_empty_document(self):
         """空のドキュメントのテスト"""
         content = ""